@@ -7,12 +7,14 @@ import requests
 from datetime import datetime, timedelta
 import time
 import logging
-import random
 
-# Setup basic logging
+# Setup basic logging (per-rerun and per-tick messages are DEBUG; only fetch entry/exit log at INFO)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shortest auto-refresh interval (seconds); cached data never outlives it
+MIN_REFRESH_INTERVAL = 5
+
 # Set page config
 st.set_page_config(
     page_title="Sensor Data Dashboard",
@@ -20,8 +22,10 @@ st.set_page_config(
     layout="wide"
 )
 
+STATUS_LABELS = ["normal", "warning"]
+
 # Function to generate simulated sensor data
-def generate_simulated_data(start_date, end_date, sensor_ids=None, interval_minutes=15):
+def generate_simulated_data(start_date, end_date, sensor_ids=None, interval_minutes=15, seed=None):
     """
     Generate simulated sensor data for given date range and sensors.
     
@@ -30,60 +34,81 @@ def generate_simulated_data(start_date, end_date, sensor_ids=None, interval_minu
         end_date: End datetime
         sensor_ids: List of sensor IDs (if None, creates data for 3 sensors)
         interval_minutes: Data interval in minutes
+        seed: Optional seed for the PCG64 generator, for reproducible data
     
     Returns:
-        List of data points
+        pandas DataFrame with one row per sensor per interval
     """
-    logger.info(f"Generating simulated data from {start_date} to {end_date}")
+    logger.debug("Generating simulated data from %s to %s", start_date, end_date)
     
     # If no sensor IDs provided, create some
     if not sensor_ids:
         sensor_ids = ["sensor-001", "sensor-002", "sensor-003"]
     
+    # Sensor positions index the per-sensor arrays below, so keep one unique entry per sensor
+    sensor_ids = list(dict.fromkeys(sensor_ids))
+    
     # Create time range
-    current_time = start_date
-    data_points = []
-    
-    # Base values for each sensor (for realistic, consistent values)
-    base_values = {}
-    for sensor_id in sensor_ids:
-        base_values[sensor_id] = {
-            "voltage_base": random.uniform(110, 125),
-            "current_base": random.uniform(4, 8)
-        }
+    timestamps = pd.date_range(start_date, end_date, freq=f"{interval_minutes}min")
+    num_times = len(timestamps)
+    num_sensors = len(sensor_ids)
+    rng = np.random.default_rng(seed)
+    
+    # Base values for each sensor (for realistic, consistent values), parallel to sensor_ids
+    voltage_base = rng.uniform(110, 125, num_sensors)
+    current_base = rng.uniform(4, 8, num_sensors)
+    
+    # Random variation, one row per timestamp and one column per sensor
+    voltage_noise = rng.uniform(-5, 5, (num_times, num_sensors))
+    current_noise = rng.uniform(-1, 1, (num_times, num_sensors))
+    status_draws = rng.random((num_times, num_sensors))
+    
+    voltage = voltage_base[None, :] + voltage_noise
+    current = current_base[None, :] + current_noise
+    
+    # Add time-based variation (voltage drops slightly in evenings)
+    hours = timestamps.hour.to_numpy()
+    evening_factor = np.where((hours >= 18) & (hours <= 22), 0.98, 1.0)  # 2% voltage drop in evening
+    voltage *= evening_factor[:, None]
+    
+    status_codes = (status_draws <= 0.05).astype(np.int8)
+    
+    # Readings only need a few significant digits for display
+    voltage = voltage.astype(np.float32)
+    current = current.astype(np.float32)
+    
+    # Flatten into typed columns ordered by timestamp, then sensor
+    data = pd.DataFrame({
+        "id": pd.Categorical.from_codes(np.tile(np.arange(num_sensors), num_times), sensor_ids),
+        "timestamp": np.repeat(timestamps.values, num_sensors),
+        "voltage": voltage.ravel(),
+        "current": current.ravel(),
+        "status": pd.Categorical.from_codes(status_codes.ravel(), STATUS_LABELS)
+    })
     
-    # Create data points at regular intervals
-    while current_time <= end_date:
-        for sensor_id in sensor_ids:
-            # Get base values for this sensor
-            voltage_base = base_values[sensor_id]["voltage_base"]
-            current_base = base_values[sensor_id]["current_base"]
-            
-            # Add some random variation
-            voltage = voltage_base + random.uniform(-5, 5)
-            current = current_base + random.uniform(-1, 1)
-            
-            # Add time-based variation (voltage drops slightly in evenings)
-            hour = current_time.hour
-            if 18 <= hour <= 22:
-                voltage *= 0.98  # 2% voltage drop in evening
-            
-            # Create data point
-            data_point = {
-                "id": sensor_id,
-                "timestamp": current_time.isoformat(),
-                "voltage": voltage,
-                "current": current,
-                "status": "normal" if random.random() > 0.05 else "warning"
-            }
-            
-            data_points.append(data_point)
-        
-        # Move to next time interval
-        current_time += timedelta(minutes=interval_minutes)
+    data.attrs['sorted_by'] = 'timestamp'
     
-    logger.info(f"Generated {len(data_points)} simulated data points")
-    return data_points
+    logger.debug("Generated %s simulated data points", len(data))
+    return data
+
+# Align a datetime to the start of its interval so cache keys are stable across reruns
+def align_to_interval(dt, interval_minutes=15):
+    return pd.Timestamp(dt).floor(f"{interval_minutes}min").to_pydatetime()
+
+# Cached data generation, keyed on (start, end, sensor_id, interval)
+@st.cache_data(ttl=MIN_REFRESH_INTERVAL, show_spinner=False)
+def load_sensor_data(start_date, end_date, sensor_id=None, interval_minutes=15):
+    """
+    Generates simulated data, reusing the result across reruns.
+    
+    Args:
+        start_date: Start datetime (aligned to interval_minutes)
+        end_date: End datetime (aligned to interval_minutes)
+        sensor_id: Single sensor ID, or None for all sensors
+        interval_minutes: Data interval in minutes
+    """
+    sensor_ids = [sensor_id] if sensor_id else None
+    return generate_simulated_data(start_date, end_date, sensor_ids, interval_minutes)
 
 # Function to fetch simulated data (replaces API call)
 def fetch_all_sensor_data():
@@ -94,14 +119,14 @@ def fetch_all_sensor_data():
         end_date = datetime.now()
         start_date = end_date - timedelta(days=7)
         
-        data = generate_simulated_data(start_date, end_date)
+        data = load_sensor_data(align_to_interval(start_date), align_to_interval(end_date))
         logger.info(f"Generated {len(data)} records")
         return data
     except Exception as e:
         error_msg = f"Error generating data: {str(e)}"
         logger.exception(error_msg)
         st.error(error_msg)
-        return []
+        return pd.DataFrame()
 
 def fetch_sensor_data_by_id(sensor_id):
     try:
@@ -111,23 +136,26 @@ def fetch_sensor_data_by_id(sensor_id):
         end_date = datetime.now()
         start_date = end_date - timedelta(days=7)
         
-        data = generate_simulated_data(start_date, end_date, [sensor_id])
+        data = load_sensor_data(align_to_interval(start_date), align_to_interval(end_date), sensor_id)
         logger.info(f"Generated {len(data)} records")
         return data
     except Exception as e:
         error_msg = f"Error generating data for sensor {sensor_id}: {str(e)}"
         logger.exception(error_msg)
         st.error(error_msg)
-        return None
+        return pd.DataFrame()
 
 def fetch_sensor_data_in_range(start_date, end_date, sensor_id=None):
     try:
         logger.info(f"Generating data in range: {start_date} to {end_date}")
         
+        start_date = align_to_interval(start_date)
+        end_date = align_to_interval(end_date)
+        
         if sensor_id and sensor_id != "All":
-            data = generate_simulated_data(start_date, end_date, [sensor_id])
+            data = load_sensor_data(start_date, end_date, sensor_id)
         else:
-            data = generate_simulated_data(start_date, end_date)
+            data = load_sensor_data(start_date, end_date)
         
         logger.info(f"Generated {len(data)} records in range")
         return data
@@ -135,68 +163,54 @@ def fetch_sensor_data_in_range(start_date, end_date, sensor_id=None):
         error_msg = f"Error generating data in range: {str(e)}"
         logger.exception(error_msg)
         st.error(error_msg)
-        return []
+        return pd.DataFrame()
 
-# Function to transform sensor data into pandas DataFrame
+# Function to derive power from sensor data
+def compute_power(df):
+    """
+    Computes power (voltage * current) on demand, without storing a column.
+    Only the charts that display power pay for it.
+    
+    Args:
+        df: pandas DataFrame with voltage and current columns
+    
+    Returns:
+        numpy array of power values
+    """
+    return df['voltage'].values * df['current'].values
+
+# Column dtypes for sensor records, matching the output of generate_simulated_data
+SENSOR_DTYPES = {
+    "id": "category",
+    "voltage": np.float32,
+    "current": np.float32,
+    "status": "category",
+}
+
+# Function to transform raw sensor records (list of dicts) into pandas DataFrame
 def process_sensor_data(data):
+    """
+    Converts raw sensor records (e.g. from an API) into a DataFrame typed like
+    generated data. Simulated data is already typed and does not go through here.
+    
+    Args:
+        data: List of dicts with id, timestamp, voltage, current and status keys
+    """
     try:
-        logger.info("Processing sensor data")
+        logger.debug("Processing sensor data")
         
         if not data:
             logger.warning("No data to process")
             return pd.DataFrame()
         
-        # Create DataFrame
+        # Create DataFrame and set all column types in one pass
         df = pd.DataFrame(data)
-        
-        logger.info(f"Created DataFrame with shape: {df.shape}")
-        
-        if df.empty:
-            logger.warning("DataFrame is empty after creation")
-            return df
-            
-        # Convert timestamp to datetime
         if 'timestamp' in df.columns:
-            try:
-                logger.info("Converting timestamp column to datetime")
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                logger.info("Timestamp conversion successful")
-            except Exception as e:
-                logger.error(f"Error converting timestamps: {str(e)}")
+            # Explicit ISO 8601 skips per-call format inference; cache dedupes repeated timestamps
+            df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', cache=True)
+        df = df.astype({col: dtype for col, dtype in SENSOR_DTYPES.items() if col in df.columns})
         
-        # Convert voltage and current to standard float
-        if 'voltage' in df.columns:
-            try:
-                logger.info("Converting voltage to float")
-                df['voltage'] = df['voltage'].astype(float)
-            except Exception as e:
-                logger.error(f"Error converting voltage: {str(e)}")
-        
-        if 'current' in df.columns:
-            try:
-                logger.info("Converting current to float")
-                df['current'] = df['current'].astype(float)
-            except Exception as e:
-                logger.error(f"Error converting current: {str(e)}")
-        
-        # Calculate power (voltage * current)
-        if 'voltage' in df.columns and 'current' in df.columns:
-            try:
-                logger.info("Calculating power from voltage and current")
-                df['power'] = df['voltage'] * df['current']
-                logger.info("Power calculation successful")
-            except Exception as e:
-                logger.error(f"Error calculating power: {str(e)}")
-        
-        # Ensure id is string type
-        if 'id' in df.columns:
-            try:
-                logger.info("Converting id to string")
-                df['id'] = df['id'].astype(str)
-            except Exception as e:
-                logger.error(f"Error converting id: {str(e)}")
-        
-        logger.info("Data processing complete")
+        logger.debug("Processed DataFrame with shape: %s", df.shape)
         return df
         
     except Exception as e:
@@ -206,11 +220,31 @@ def process_sensor_data(data):
         # Return empty DataFrame on error
         return pd.DataFrame()
 
+# Sensor ID options for the sidebar selectbox, computed once per fetch
+def get_sensor_id_options(df):
+    if df.empty or 'id' not in df.columns:
+        return ["All"]
+    # The id column is categorical, so its categories are already the unique IDs
+    return ["All"] + sorted(df['id'].cat.categories.tolist())
+
+# Least-squares trendline coefficients (slope, intercept) for voltage vs current
+def fit_line(voltage, current):
+    slope, intercept = np.polyfit(voltage, current, 1)
+    return float(slope), float(intercept)
+
+# Cached fit for historical data. Takes raw float32 bytes so the cache key is a cheap
+# bytes hash rather than a pandas hash; max_entries bounds it like the figure cache.
+@st.cache_data(show_spinner=False, max_entries=16)
+def fit_trendline(voltage_bytes, current_bytes):
+    voltage = np.frombuffer(voltage_bytes, dtype=np.float32)
+    current = np.frombuffer(current_bytes, dtype=np.float32)
+    return fit_line(voltage, current)
+
 # Function to simulate real-time data flow
 def simulate_real_time_data(df, simulation_speed=1):
     """
     Simulates real-time data by taking data points from the DataFrame at specified intervals.
-    Returns a generator that yields one data point at a time.
+    Returns the next simulation_speed points as a dict of NumPy column views.
     
     Args:
         df: pandas DataFrame with sensor data
@@ -220,8 +254,16 @@ def simulate_real_time_data(df, simulation_speed=1):
         logger.warning("Cannot simulate real-time data with empty DataFrame or missing timestamp")
         return
     
-    # Sort by timestamp to ensure proper sequence
-    df = df.sort_values('timestamp')
+    # Extract the buffered columns as arrays once per base DataFrame, so ticks only slice views
+    source = st.session_state.get('simulation_source')
+    if source is None or source['df'] is not df:
+        # Generated data is already in timestamp order; sort anything else once, in place
+        if df.attrs.get('sorted_by') != 'timestamp':
+            df.sort_values('timestamp', inplace=True)
+            df.attrs['sorted_by'] = 'timestamp'
+        
+        source = {'df': df, 'columns': {col: df[col].to_numpy() for col in BUFFER_COLUMNS}}
+        st.session_state['simulation_source'] = source
     
     # Get current simulation position from session state
     if 'simulation_index' not in st.session_state:
@@ -234,39 +276,251 @@ def simulate_real_time_data(df, simulation_speed=1):
         index = 0
     
     # Get the next data point
-    data_point = df.iloc[index:index+simulation_speed]
+    window = slice(index, index + simulation_speed)
+    data_point = {col: values[window] for col, values in source['columns'].items()}
     
     # Update session state with new index
     st.session_state['simulation_index'] = (index + simulation_speed) % len(df)
     
     return data_point
 
+# Max buffer size (number of data points to keep)
+MAX_BUFFER_SIZE = 100
+
+# Columns held in the real-time buffer and their dtypes
+BUFFER_COLUMNS = {
+    "id": object,
+    "timestamp": "datetime64[ns]",
+    "voltage": np.float32,
+    "current": np.float32,
+}
+
 # Function to update real-time data buffer
 def update_real_time_buffer(new_data):
     """
     Updates the real-time data buffer with new data points.
-    Maintains a fixed buffer size to avoid memory issues.
+    The buffer is a fixed-size ring of preallocated column arrays, so each
+    insert is O(1) regardless of how much history it holds.
     
     Args:
-        new_data: pandas DataFrame with new data points to add
+        new_data: dict of equal-length column arrays, as returned by simulate_real_time_data
     """
     if 'real_time_buffer' not in st.session_state:
-        # Initialize buffer with new data
-        st.session_state['real_time_buffer'] = new_data
-        return
+        # Preallocate one array per column
+        buffer = {col: np.empty(MAX_BUFFER_SIZE, dtype=dtype) for col, dtype in BUFFER_COLUMNS.items()}
+        buffer['head'] = 0
+        buffer['count'] = 0
+        st.session_state['real_time_buffer'] = buffer
+    
+    buffer = st.session_state['real_time_buffer']
+    
+    # Only the most recent MAX_BUFFER_SIZE points can survive the write
+    num_new = min(len(new_data['timestamp']), MAX_BUFFER_SIZE)
+    slots = (buffer['head'] + np.arange(num_new)) % MAX_BUFFER_SIZE
+    
+    for col in BUFFER_COLUMNS:
+        buffer[col][slots] = new_data[col][-num_new:]
     
-    # Max buffer size (number of data points to keep)
-    MAX_BUFFER_SIZE = 100
+    buffer['head'] = (buffer['head'] + num_new) % MAX_BUFFER_SIZE
+    buffer['count'] = min(buffer['count'] + num_new, MAX_BUFFER_SIZE)
+
+def get_real_time_buffer_df():
+    """
+    Materializes the real-time buffer as a DataFrame, oldest point first.
+    Returns an empty DataFrame if the buffer has not been started.
+    """
+    buffer = st.session_state.get('real_time_buffer')
+    if buffer is None or buffer['count'] == 0:
+        return pd.DataFrame()
     
-    # Combine existing buffer with new data
-    buffer = pd.concat([st.session_state['real_time_buffer'], new_data])
+    if buffer['count'] < MAX_BUFFER_SIZE:
+        # Not wrapped yet, so the filled prefix is already in order
+        order = slice(0, buffer['count'])
+    else:
+        order = (buffer['head'] + np.arange(MAX_BUFFER_SIZE)) % MAX_BUFFER_SIZE
+    
+    return pd.DataFrame({col: buffer[col][order] for col in BUFFER_COLUMNS}, copy=False)
+
+# Chart figure builders
+def build_voltage_figure(df):
+    fig = px.line(df, x='timestamp', y='voltage',
+                title="Voltage measurements over time",
+                labels={"timestamp": "Time", "voltage": "Voltage (V)"})
+    fig.update_layout(height=400)
+    return fig
+
+def build_current_figure(df):
+    fig = px.line(df, x='timestamp', y='current',
+                title="Current measurements over time",
+                labels={"timestamp": "Time", "current": "Current (A)"})
+    fig.update_layout(height=400)
+    return fig
+
+def build_power_figure(df):
+    fig = px.area(df.assign(power=compute_power(df)), x='timestamp', y='power',
+                title="Power consumption over time",
+                labels={"timestamp": "Time", "power": "Power (W)"},
+                color_discrete_sequence=["rgba(0, 128, 0, 0.5)"])
+    fig.update_layout(height=400)
+    return fig
+
+def build_scatter_figure(df, cache_fit=True):
+    # Create scatter plot of voltage vs current
+    # (cache_fit=False for the real-time buffer, whose fit never repeats)
+    fig = px.scatter(df.assign(power=compute_power(df)), x='voltage', y='current',
+                    title="Voltage vs Current",
+                    labels={"voltage": "Voltage (V)", "current": "Current (A)"},
+                    color='power',
+                    color_continuous_scale='viridis')
+    fig.update_layout(height=400)
+    
+    # Only add best fit line if we have enough valid data points
+    valid_data = df.dropna(subset=['voltage', 'current'])
+    if len(valid_data) >= 2:  # Need at least 2 points for a line
+        try:
+            # Add a best fit line
+            fit_voltage = valid_data['voltage'].to_numpy(dtype=np.float32)
+            fit_current = valid_data['current'].to_numpy(dtype=np.float32)
+            if cache_fit:
+                slope, intercept = fit_trendline(fit_voltage.tobytes(), fit_current.tobytes())
+            else:
+                slope, intercept = fit_line(fit_voltage, fit_current)
+            y_fit = slope * df['voltage'].values + intercept
+            
+            fig.add_trace(go.Scatter(
+                x=df['voltage'],
+                y=y_fit,
+                mode='lines',
+                name='Trend Line',
+                line=dict(color='red', dash='dash')
+            ))
+            logger.debug("Added trendline to scatter plot successfully")
+        except Exception as e:
+            st.warning(f"Could not calculate trendline: {str(e)}")
+            logger.warning(f"Could not calculate trendline: {str(e)}")
     
-    # Keep only the most recent MAX_BUFFER_SIZE data points
-    if len(buffer) > MAX_BUFFER_SIZE:
-        buffer = buffer.iloc[-MAX_BUFFER_SIZE:]
+    return fig
+
+FIGURE_BUILDERS = {
+    "voltage": build_voltage_figure,
+    "current": build_current_figure,
+    "power": build_power_figure,
+    "scatter": build_scatter_figure,
+}
+
+# Upper bound on points per historical chart sent through Plotly's serializer to the browser
+MAX_CHART_POINTS = 1000
+
+def downsample_for_chart(df):
+    """
+    Thins a DataFrame to at most MAX_CHART_POINTS rows for plotting.
+    Keeps every n-th reading of each sensor; a plain row stride would alias
+    against the interleaved sensor order and drop whole sensors.
+    """
+    if len(df) <= MAX_CHART_POINTS:
+        return df
+    if 'id' not in df.columns:
+        step = -(-len(df) // MAX_CHART_POINTS)  # ceiling division
+        return df.iloc[::step]
+    
+    # Size the stride from the busiest sensor, so every sensor keeps at most its
+    # equal share of the points and the total cannot overshoot
+    counts = df['id'].value_counts()
+    counts = counts[counts > 0]
+    per_sensor = max(MAX_CHART_POINTS // len(counts), 1)
+    step = -(-counts.max() // per_sensor)  # ceiling division
+    thinned = df[df.groupby('id', observed=True).cumcount().values % step == 0]
+    # Only reachable with more sensors than MAX_CHART_POINTS
+    return thinned.iloc[:MAX_CHART_POINTS]
+
+# Cheap DataFrame signature for figure caching (avoids hashing every row)
+def dataframe_signature(df):
+    return (len(df), tuple(df.columns), df['timestamp'].iloc[0], df['timestamp'].iloc[-1],
+            float(df['voltage'].iloc[-1]))
+
+# Figures are shared by reference, so callers must not mutate them after caching
+@st.cache_resource(hash_funcs={pd.DataFrame: dataframe_signature}, max_entries=16, show_spinner=False)
+def get_cached_figure(kind, df):
+    return FIGURE_BUILDERS[kind](downsample_for_chart(df))
+
+# Time-series charts whose single trace can be updated in place
+LIVE_SERIES = ("voltage", "current", "power")
+
+def get_live_figure(kind, df):
+    """
+    Returns a simulation-mode figure retained in session state across ticks.
+    Time-series traces get their x/y replaced in place; the scatter plot is
+    rebuilt because its trendline is refit on every tick.
+    """
+    figures = st.session_state.setdefault('live_figures', {})
+    if kind in LIVE_SERIES and kind in figures:
+        trace = figures[kind].data[0]
+        trace.x = df['timestamp'].values
+        trace.y = compute_power(df) if kind == "power" else df[kind].values
+    elif kind == "scatter":
+        figures[kind] = build_scatter_figure(df, cache_fit=False)
+    else:
+        figures[kind] = FIGURE_BUILDERS[kind](df)
+    return figures[kind]
+
+def make_figure(kind, df, live=False):
+    """
+    Returns the Plotly figure for a chart kind.
     
-    # Update session state
-    st.session_state['real_time_buffer'] = buffer
+    Args:
+        kind: One of the FIGURE_BUILDERS keys
+        df: pandas DataFrame to plot
+        live: True for the real-time buffer, which changes every tick and bypasses the cache.
+              Historical figures are downsampled; the buffer is small and drawn in full.
+    """
+    if live:
+        return get_live_figure(kind, df)
+    return get_cached_figure(kind, df)
+
+# Function to render the summary metric tiles
+def render_summary_metrics(df):
+    try:
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Total Readings", f"{len(df)}")
+        
+        if 'voltage' in df.columns:
+            with col2:
+                try:
+                    avg_voltage = df['voltage'].mean()
+                    st.metric("Average Voltage", f"{avg_voltage:.2f} V")
+                    logger.debug("Average voltage: %.2f V", avg_voltage)
+                except Exception as e:
+                    logger.error(f"Error calculating average voltage: {str(e)}")
+                    st.metric("Average Voltage", "Error")
+        
+        if 'current' in df.columns:
+            with col3:
+                try:
+                    avg_current = df['current'].mean()
+                    st.metric("Average Current", f"{avg_current:.2f} A")
+                    logger.debug("Average current: %.2f A", avg_current)
+                except Exception as e:
+                    logger.error(f"Error calculating average current: {str(e)}")
+                    st.metric("Average Current", "Error")
+        
+        if 'voltage' in df.columns and 'current' in df.columns:
+            with col4:
+                try:
+                    # Mean of voltage * current as a single dot-product reduction
+                    avg_power = np.dot(df['voltage'].values, df['current'].values) / len(df)
+                    st.metric("Average Power", f"{avg_power:.2f} W")
+                    logger.debug("Average power: %.2f W", avg_power)
+                except Exception as e:
+                    logger.error(f"Error calculating average power: {str(e)}")
+                    st.metric("Average Power", "Error")
+        
+        logger.debug("Completed summary metrics section")
+    except Exception as e:
+        error_msg = f"Error in summary metrics section: {str(e)}"
+        logger.exception(error_msg)
+        st.error(error_msg)
 
 # Dashboard title
 st.title("Power Monitoring Dashboard")
@@ -278,7 +532,7 @@ st.sidebar.header("Dashboard Controls")
 # Auto-refresh option
 auto_refresh = st.sidebar.checkbox("Auto-refresh data", value=False)
 refresh_interval = st.sidebar.slider("Refresh interval (seconds)", 
-                                     min_value=5, max_value=60, value=30, 
+                                     min_value=MIN_REFRESH_INTERVAL, max_value=60, value=30, 
                                      disabled=not auto_refresh)
 
 # Real-time simulation mode
@@ -303,39 +557,34 @@ end_time = st.sidebar.time_input("End time", value=datetime.max.time())
 start_datetime = datetime.combine(start_date, start_time)
 end_datetime = datetime.combine(end_date, end_time)
 
-logger.info(f"Date range selected: {start_datetime} to {end_datetime}")
+logger.debug("Date range selected: %s to %s", start_datetime, end_datetime)
 
 # Filter options
 st.sidebar.header("Filter Options")
 
-# Initialize sensor_ids with a default
-sensor_ids = ["All"]
-
-# Only try to get unique sensor IDs if we have data
-if 'sensor_data' in st.session_state:
-    if not st.session_state['sensor_data'].empty:
-        if 'id' in st.session_state['sensor_data'].columns:
-            sensor_ids = ["All"] + list(st.session_state['sensor_data']['id'].unique())
+# Sensor IDs are refreshed whenever data is fetched; default to "All" until then
+sensor_ids = st.session_state.get('sensor_id_options', ["All"])
 
 selected_sensor_id = st.sidebar.selectbox("Sensor ID", sensor_ids)
-logger.info(f"Selected sensor ID: {selected_sensor_id}")
+logger.debug("Selected sensor ID: %s", selected_sensor_id)
 
 # Fetch data button
 if st.sidebar.button("Fetch Data"):
-    logger.info("Fetch Data button clicked")
+    logger.debug("Fetch Data button clicked")
     with st.spinner("Generating simulated data..."):
         try:
             if selected_sensor_id == "All":
-                logger.info("Generating data for all sensors")
+                logger.debug("Generating data for all sensors")
                 sensor_data = fetch_sensor_data_in_range(start_datetime, end_datetime)
             else:
-                logger.info(f"Generating data for sensor {selected_sensor_id}")
+                logger.debug("Generating data for sensor %s", selected_sensor_id)
                 sensor_data = fetch_sensor_data_in_range(start_datetime, end_datetime, selected_sensor_id)
             
-            logger.info(f"Generated {len(sensor_data)} records")
+            logger.debug("Generated %s records", len(sensor_data))
             
-            df = process_sensor_data(sensor_data)
+            df = sensor_data
             st.session_state['sensor_data'] = df
+            st.session_state['sensor_id_options'] = get_sensor_id_options(df)
             st.session_state['last_refresh'] = datetime.now()
             
             # Reset simulation index when fetching new data
@@ -346,7 +595,7 @@ if st.sidebar.button("Fetch Data"):
             if 'real_time_buffer' in st.session_state:
                 del st.session_state['real_time_buffer']
             
-            logger.info(f"Data processed and stored in session state. DataFrame shape: {df.shape}")
+            logger.debug("Data processed and stored in session state. DataFrame shape: %s", df.shape)
             
             # Success message
             st.success(f"Successfully generated {len(sensor_data)} data points for the selected range")
@@ -357,18 +606,19 @@ if st.sidebar.button("Fetch Data"):
 
 # Initialize session state for data
 if 'sensor_data' not in st.session_state:
-    logger.info("Initializing session state with initial data generation")
+    logger.debug("Initializing session state with initial data generation")
     
     with st.spinner("Generating initial data..."):
         try:
             sensor_data = fetch_all_sensor_data()
-            logger.info(f"Generated {len(sensor_data)} records for initial load")
+            logger.debug("Generated %s records for initial load", len(sensor_data))
             
-            df = process_sensor_data(sensor_data)
+            df = sensor_data
             st.session_state['sensor_data'] = df
+            st.session_state['sensor_id_options'] = get_sensor_id_options(df)
             st.session_state['last_refresh'] = datetime.now()
             
-            logger.info(f"Initial data processed and stored in session state. DataFrame shape: {df.shape}")
+            logger.debug("Initial data processed and stored in session state. DataFrame shape: %s", df.shape)
         except Exception as e:
             error_msg = f"Error during initial data generation: {str(e)}"
             logger.exception(error_msg)
@@ -379,13 +629,13 @@ if 'sensor_data' not in st.session_state:
 
 # Auto-refresh logic for batch data
 if auto_refresh and not simulation_mode:
-    logger.info("Auto-refresh is enabled")
+    logger.debug("Auto-refresh is enabled")
     if 'last_refresh' in st.session_state:
         time_since_refresh = (datetime.now() - st.session_state['last_refresh']).total_seconds()
-        logger.info(f"Time since last refresh: {time_since_refresh} seconds")
+        logger.debug("Time since last refresh: %s seconds", time_since_refresh)
         
         if time_since_refresh > refresh_interval:
-            logger.info("Auto-refreshing data")
+            logger.debug("Auto-refreshing data")
             with st.spinner("Auto-refreshing data..."):
                 try:
                     if selected_sensor_id == "All":
@@ -393,11 +643,12 @@ if auto_refresh and not simulation_mode:
                     else:
                         sensor_data = fetch_sensor_data_in_range(start_datetime, end_datetime, selected_sensor_id)
                     
-                    df = process_sensor_data(sensor_data)
+                    df = sensor_data
                     st.session_state['sensor_data'] = df
+                    st.session_state['sensor_id_options'] = get_sensor_id_options(df)
                     st.session_state['last_refresh'] = datetime.now()
                     
-                    logger.info(f"Auto-refresh complete. DataFrame shape: {df.shape}")
+                    logger.debug("Auto-refresh complete. DataFrame shape: %s", df.shape)
                 except Exception as e:
                     error_msg = f"Error during auto-refresh: {str(e)}"
                     logger.exception(error_msg)
@@ -411,7 +662,7 @@ if simulation_mode and 'sensor_data' in st.session_state and not st.session_stat
     # Get next data point for simulation
     new_data_point = simulate_real_time_data(base_df, simulation_speed)
     
-    if new_data_point is not None and not new_data_point.empty:
+    if new_data_point is not None:
         # Update real-time buffer with new data point
         update_real_time_buffer(new_data_point)
         
@@ -419,15 +670,15 @@ if simulation_mode and 'sensor_data' in st.session_state and not st.session_stat
         st.session_state['last_refresh'] = datetime.now()
         
         # Use real-time buffer for visualization
-        df = st.session_state['real_time_buffer']
-        logger.info(f"Real-time simulation active. Buffer size: {len(df)}")
+        df = get_real_time_buffer_df()
+        logger.debug("Real-time simulation active. Buffer size: %s", len(df))
     else:
         df = base_df
 else:
     # Get data from session state (normal mode)
     try:
         df = st.session_state['sensor_data']
-        logger.info(f"Retrieved data from session state. DataFrame shape: {df.shape}")
+        logger.debug("Retrieved data from session state. DataFrame shape: %s", df.shape)
     except Exception as e:
         error_msg = f"Error retrieving data from session state: {str(e)}"
         logger.exception(error_msg)
@@ -437,8 +688,9 @@ else:
 # Display last update time
 if 'last_refresh' in st.session_state:
     refresh_time = st.session_state['last_refresh'].strftime('%Y-%m-%d %H:%M:%S')
-    logger.info(f"Last refresh time: {refresh_time}")
-    st.sidebar.markdown(f"Last updated: {refresh_time}")
+    logger.debug("Last refresh time: %s", refresh_time)
+    last_updated = st.sidebar.empty()
+    last_updated.markdown(f"Last updated: {refresh_time}")
 
 # Simulation status indicator
 if simulation_mode:
@@ -450,52 +702,14 @@ if df.empty:
     logger.warning("DataFrame is empty, showing warning")
     st.warning("No sensor data available. Click 'Fetch Data' to generate simulated data.")
 else:
-    logger.info(f"DataFrame has data. Shape: {df.shape}")
+    logger.debug("DataFrame has data. Shape: %s", df.shape)
     
     # Display summary metrics
     st.markdown("## Power Metrics Summary")
     
-    try:
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric("Total Readings", f"{len(df)}")
-        
-        if 'voltage' in df.columns:
-            with col2:
-                try:
-                    avg_voltage = df['voltage'].mean()
-                    st.metric("Average Voltage", f"{avg_voltage:.2f} V")
-                    logger.info(f"Average voltage: {avg_voltage:.2f} V")
-                except Exception as e:
-                    logger.error(f"Error calculating average voltage: {str(e)}")
-                    st.metric("Average Voltage", "Error")
-        
-        if 'current' in df.columns:
-            with col3:
-                try:
-                    avg_current = df['current'].mean()
-                    st.metric("Average Current", f"{avg_current:.2f} A")
-                    logger.info(f"Average current: {avg_current:.2f} A")
-                except Exception as e:
-                    logger.error(f"Error calculating average current: {str(e)}")
-                    st.metric("Average Current", "Error")
-        
-        if 'power' in df.columns:
-            with col4:
-                try:
-                    avg_power = df['power'].mean()
-                    st.metric("Average Power", f"{avg_power:.2f} W")
-                    logger.info(f"Average power: {avg_power:.2f} W")
-                except Exception as e:
-                    logger.error(f"Error calculating average power: {str(e)}")
-                    st.metric("Average Power", "Error")
-        
-        logger.info("Completed summary metrics section")
-    except Exception as e:
-        error_msg = f"Error in summary metrics section: {str(e)}"
-        logger.exception(error_msg)
-        st.error(error_msg)
+    metrics_area = st.empty()
+    with metrics_area.container():
+        render_summary_metrics(df)
     
     # Main visualizations
     st.markdown("## Data Visualizations")
@@ -516,13 +730,9 @@ else:
             if 'timestamp' in df.columns and 'voltage' in df.columns:
                 try:
                     # Create line chart for voltage
-                    fig = px.line(df, x='timestamp', y='voltage',
-                                title="Voltage measurements over time",
-                                labels={"timestamp": "Time", "voltage": "Voltage (V)"})
-                    
-                    fig.update_layout(height=400)
+                    fig = make_figure("voltage", df, live=simulation_mode)
                     voltage_chart.plotly_chart(fig, use_container_width=True)
-                    logger.info("Voltage chart created successfully")
+                    logger.debug("Voltage chart created successfully")
                 except Exception as e:
                     error_msg = f"Error creating voltage chart: {str(e)}"
                     logger.exception(error_msg)
@@ -539,13 +749,9 @@ else:
             if 'timestamp' in df.columns and 'current' in df.columns:
                 try:
                     # Create line chart for current
-                    fig = px.line(df, x='timestamp', y='current',
-                                title="Current measurements over time",
-                                labels={"timestamp": "Time", "current": "Current (A)"})
-                    
-                    fig.update_layout(height=400)
+                    fig = make_figure("current", df, live=simulation_mode)
                     current_chart.plotly_chart(fig, use_container_width=True)
-                    logger.info("Current chart created successfully")
+                    logger.debug("Current chart created successfully")
                 except Exception as e:
                     error_msg = f"Error creating current chart: {str(e)}"
                     logger.exception(error_msg)
@@ -567,17 +773,12 @@ else:
         with row2_col1:
             st.subheader("Power Consumption Over Time")
             
-            if 'timestamp' in df.columns and 'power' in df.columns:
+            if 'timestamp' in df.columns and 'voltage' in df.columns and 'current' in df.columns:
                 try:
                     # Create area chart for power
-                    fig = px.area(df, x='timestamp', y='power',
-                                title="Power consumption over time",
-                                labels={"timestamp": "Time", "power": "Power (W)"},
-                                color_discrete_sequence=["rgba(0, 128, 0, 0.5)"])
-                    
-                    fig.update_layout(height=400)
+                    fig = make_figure("power", df, live=simulation_mode)
                     power_chart.plotly_chart(fig, use_container_width=True)
-                    logger.info("Power chart created successfully")
+                    logger.debug("Power chart created successfully")
                 except Exception as e:
                     error_msg = f"Error creating power chart: {str(e)}"
                     logger.exception(error_msg)
@@ -585,46 +786,19 @@ else:
             else:
                 if 'timestamp' not in df.columns:
                     st.warning("Missing timestamp column for time series")
-                if 'power' not in df.columns:
-                    st.warning("Missing power column for power chart")
+                if 'voltage' not in df.columns or 'current' not in df.columns:
+                    st.warning("Missing voltage or current column for power chart")
         
         with row2_col2:
             st.subheader("Voltage vs Current Relationship")
             
             if 'voltage' in df.columns and 'current' in df.columns:
                 try:
-                    # Create scatter plot of voltage vs current
-                    fig = px.scatter(df, x='voltage', y='current',
-                                    title="Voltage vs Current",
-                                    labels={"voltage": "Voltage (V)", "current": "Current (A)"},
-                                    color='power' if 'power' in df.columns else None,
-                                    color_continuous_scale='viridis')
-                    
-                    # Add trendline
-                    fig.update_layout(height=400)
-                    
-                    # Only add best fit line if we have enough valid data points
-                    valid_data = df.dropna(subset=['voltage', 'current'])
-                    if len(valid_data) >= 2:  # Need at least 2 points for a line
-                        try:
-                            # Add a best fit line
-                            poly_coeffs = np.polyfit(valid_data['voltage'], valid_data['current'], 1)
-                            y_fit = np.poly1d(poly_coeffs)(df['voltage'])
-                            
-                            fig.add_trace(go.Scatter(
-                                x=df['voltage'],
-                                y=y_fit,
-                                mode='lines',
-                                name='Trend Line',
-                                line=dict(color='red', dash='dash')
-                            ))
-                            logger.info("Added trendline to scatter plot successfully")
-                        except Exception as e:
-                            st.warning(f"Could not calculate trendline: {str(e)}")
-                            logger.warning(f"Could not calculate trendline: {str(e)}")
+                    # Create scatter plot of voltage vs current with trendline
+                    fig = make_figure("scatter", df, live=simulation_mode)
                     
                     scatter_chart.plotly_chart(fig, use_container_width=True)
-                    logger.info("Scatter plot created successfully")
+                    logger.debug("Scatter plot created successfully")
                 except Exception as e:
                     error_msg = f"Error creating scatter plot: {str(e)}"
                     logger.exception(error_msg)
@@ -643,22 +817,48 @@ else:
     if simulation_mode:
         # Add a real-time simulation indicator with timestamp
         st.markdown("---")
-        st.markdown(f"**Real-time Simulation Active** - Last point added at {refresh_time}")
+        simulation_header = st.empty()
+        simulation_stats = st.empty()
+        st.info("The dashboard is simulating real-time data flow and updates every second.")
+        
+        live_charts = {
+            "voltage": voltage_chart,
+            "current": current_chart,
+            "power": power_chart,
+            "scatter": scatter_chart,
+        }
         
-        # Add real-time statistics
-        if 'real_time_buffer' in st.session_state:
-            buffer_df = st.session_state['real_time_buffer']
+        # Update the existing placeholders in place rather than rerunning the whole
+        # script; Streamlit stops this loop when a widget triggers a rerun
+        while True:
+            refresh_time = st.session_state['last_refresh'].strftime('%Y-%m-%d %H:%M:%S')
+            simulation_header.markdown(f"**Real-time Simulation Active** - Last point added at {refresh_time}")
+            
+            # Add real-time statistics
+            buffer_df = get_real_time_buffer_df()
             if not buffer_df.empty:
-                st.markdown(f"**Simulation Stats:** {len(buffer_df)} points in buffer, "
-                           f"Showing data from {buffer_df['timestamp'].min().strftime('%H:%M:%S')} "
-                           f"to {buffer_df['timestamp'].max().strftime('%H:%M:%S')}")
-        
-        # Information about rerunning for simulation 
-        st.info("The dashboard is simulating real-time data flow. Wait 1 second for the next update...")
-        
-        # Force a rerun after 1 second to simulate real-time updates
-        time.sleep(1)
-        st.experimental_rerun()
+                simulation_stats.markdown(f"**Simulation Stats:** {len(buffer_df)} points in buffer, "
+                                          f"Showing data from {buffer_df['timestamp'].min().strftime('%H:%M:%S')} "
+                                          f"to {buffer_df['timestamp'].max().strftime('%H:%M:%S')}")
+            
+            time.sleep(1)
+            
+            new_data_point = simulate_real_time_data(base_df, simulation_speed)
+            update_real_time_buffer(new_data_point)
+            st.session_state['last_refresh'] = datetime.now()
+            df = get_real_time_buffer_df()
+            
+            with metrics_area.container():
+                render_summary_metrics(df)
+            for kind, placeholder in live_charts.items():
+                try:
+                    placeholder.plotly_chart(make_figure(kind, df, live=True), use_container_width=True)
+                except Exception as e:
+                    error_msg = f"Error updating {kind} chart: {str(e)}"
+                    logger.exception(error_msg)
+                    # Show the error in the chart's slot so repeated ticks replace it instead of stacking
+                    placeholder.error(error_msg)
+            last_updated.markdown(f"Last updated: {st.session_state['last_refresh'].strftime('%Y-%m-%d %H:%M:%S')}")
 
     # Footer with refresh information
     st.markdown("---")
@@ -688,7 +888,6 @@ with st.expander("Debug Information"):
             "timestamp": "timestamp" in df.columns,
             "voltage": "voltage" in df.columns,
             "current": "current" in df.columns,
-            "power": "power" in df.columns,
             "id": "id" in df.columns
         })
         
@@ -717,4 +916,4 @@ with st.expander("Debug Information"):
     if simulation_mode:
         st.write("Simulation Mode Stats:")
         st.write(f"Simulation Index: {st.session_state.get('simulation_index', 'Not set')}")
-        st.write(f"Buffer Size: {len(st.session_state.get('real_time_buffer', pd.DataFrame())) if 'real_time_buffer' in st.session_state else 'No buffer'}")
\ No newline at end of file
+        st.write(f"Buffer Size: {st.session_state['real_time_buffer']['count'] if 'real_time_buffer' in st.session_state else 'No buffer'}")
\ No newline at end of file